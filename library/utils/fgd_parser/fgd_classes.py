@@ -2,6 +2,8 @@ from typing import List
 
 
 class FGDProperty:
+    __slots__ = ('_name', 'value_type', '_display_name', '_default_value', '_description', '_meta')
+
     def __init__(self, name, value_type, display_name=None, default_value=None, description=None, meta=None):
         self._name = name
         self.value_type = value_type
@@ -86,6 +88,8 @@ class FGDProperty:
 
 
 class FGDChoiceProperty(FGDProperty):
+    __slots__ = ('_choices',)
+
     def __init__(self, name, value_type, display_name=None, default_value=None, description=None, meta=None,
                  choices=None):
         super().__init__(name, value_type, display_name, default_value, description, meta)
@@ -97,6 +101,8 @@ class FGDChoiceProperty(FGDProperty):
 
 
 class FGDFlagProperty(FGDProperty):
+    __slots__ = ('_flags',)
+
     def __init__(self, name, value_type, display_name=None, default_value=None, description=None, meta=None,
                  flags=None):
         super().__init__(name, value_type, display_name, default_value, description, meta)
@@ -121,6 +127,8 @@ class FGDFlagProperty(FGDProperty):
 
 
 class FGDTagProperty(FGDFlagProperty):
+    __slots__ = ()
+
     def __init__(self, name, value_type, display_name=None, default_value=None, description=None, meta=None,
                  flags=None):
         super().__init__(name, value_type, display_name, default_value, description, meta)
@@ -132,6 +140,8 @@ class FGDTagProperty(FGDFlagProperty):
 
 
 class FGDFunction:
+    __slots__ = ('name', 'type', 'args', 'doc')
+
     def __init__(self, name, func_type, args, doc):
         self.name = name
         self.type = func_type
@@ -143,6 +153,7 @@ class FGDFunction:
 
 
 class FGDEntity:
+    __slots__ = ('name', 'class_type', '_definitions', '_description', '_properties', '_io')
 
     def __init__(self, class_type, name, definitions=None, description=None,
                  properties=None, io=None):
@@ -156,6 +167,11 @@ class FGDEntity:
     def __str__(self):
         return f"{self.class_type}({self.name})"
 
+    def copy(self):
+        # override() replaces definitions and updates io/property dicts in place, so those are copied one level deep
+        return FGDEntity(self.class_type, self.name, list(self._definitions), self._description,
+                         [dict(prop) for prop in self._properties], [dict(io) for io in self._io])
+
     def _find_parent_class(self, class_name, list_of_classes: List['FGDEntity']):
         for c in list_of_classes:
             if c.name == class_name:
@@ -1,6 +1,10 @@
-from enum import Enum
+import mmap
+import re
+from enum import IntEnum
 from pathlib import Path
-from typing import List, Tuple, Union
+from string import ascii_letters
+from sys import intern
+from typing import Dict, List, Optional, Tuple, Union
 
 from ...shared.content_providers.content_manager import ContentManager
 from ...utils.fgd_parser.fgd_classes import FGDEntity
@@ -14,171 +18,229 @@ class FGDParserException(Exception):
     pass
 
 
-class FGDToken(Enum):
-    STRING = "String literal"
-    NUMERIC = "Numeric literal"
-    IDENTIFIER = "Identifier literal"
-    KEYWORD = "Keyword literal"
-    LPAREN = "("
-    RPAREN = ")"
-    LBRACKET = "["
-    RBRACKET = "]"
-    LBRACE = "{"
-    RBRACE = "}"
-    EQUALS = "="
-    COLON = ":"
-    PLUS = "+"
-    MINUS = "-"
-    COMMA = ","
-    DOT = "."
-    FSLASH = "/"
-    BSLASH = "\\"
-    EOF = "End of file"
+_WHITESPACE_RE = re.compile(rb'\s+')
+_IDENTIFIER_RE = re.compile(rb'@?\w*')
+_NUMERIC_RE = re.compile(rb'-?\d+(\.\d+)?([eE][-+]?\d+)?')
+_AT = ord('@')
+_SLASH = ord('/')
+_ASTERISK = ord('*')
+
+
+class FGDToken(IntEnum):
+    STRING = 1
+    NUMERIC = 2
+    IDENTIFIER = 3
+    KEYWORD = 4
+    LPAREN = 5
+    RPAREN = 6
+    LBRACKET = 7
+    RBRACKET = 8
+    LBRACE = 9
+    RBRACE = 10
+    EQUALS = 11
+    COLON = 12
+    PLUS = 13
+    MINUS = 14
+    COMMA = 15
+    DOT = 16
+    FSLASH = 17
+    BSLASH = 18
+    EOF = 19
+
+
+_TOKEN_NAMES = {
+    FGDToken.STRING: "String literal",
+    FGDToken.NUMERIC: "Numeric literal",
+    FGDToken.IDENTIFIER: "Identifier literal",
+    FGDToken.KEYWORD: "Keyword literal",
+    FGDToken.LPAREN: "(",
+    FGDToken.RPAREN: ")",
+    FGDToken.LBRACKET: "[",
+    FGDToken.RBRACKET: "]",
+    FGDToken.LBRACE: "{",
+    FGDToken.RBRACE: "}",
+    FGDToken.EQUALS: "=",
+    FGDToken.COLON: ":",
+    FGDToken.PLUS: "+",
+    FGDToken.MINUS: "-",
+    FGDToken.COMMA: ",",
+    FGDToken.DOT: ".",
+    FGDToken.FSLASH: "/",
+    FGDToken.BSLASH: "\\",
+    FGDToken.EOF: "End of file",
+}
+
+_SINGLE_CHAR_TOKENS = {
+    '{': FGDToken.LBRACE,
+    '}': FGDToken.RBRACE,
+    '(': FGDToken.LPAREN,
+    ')': FGDToken.RPAREN,
+    '[': FGDToken.LBRACKET,
+    ']': FGDToken.RBRACKET,
+    '=': FGDToken.EQUALS,
+    ':': FGDToken.COLON,
+    '-': FGDToken.MINUS,
+    '+': FGDToken.PLUS,
+    ',': FGDToken.COMMA,
+    '.': FGDToken.DOT,
+    '/': FGDToken.FSLASH,
+    '\\': FGDToken.BSLASH,
+}
+
+# Ready-made (token, value) tuples for every single character token, indexed by byte
+_SINGLE_CHAR_TUPLES = tuple((_SINGLE_CHAR_TOKENS[chr(code)], chr(code)) if chr(code) in _SINGLE_CHAR_TOKENS
+                            else None for code in range(256))
+
+# Byte dispatch table: the first byte of a token selects the scanner that handles it.
+# '-' and '/' are single character tokens unless they start a negative number or a comment.
+(_CHAR_INVALID, _CHAR_SINGLE, _CHAR_WHITESPACE, _CHAR_IDENTIFIER, _CHAR_STRING,
+ _CHAR_DIGIT, _CHAR_MINUS, _CHAR_SLASH) = range(8)
+
+
+def _build_char_classes():
+    classes = bytearray(256)
+    for symbol in _SINGLE_CHAR_TOKENS:
+        classes[ord(symbol)] = _CHAR_SINGLE
+    for code in b' \t\n\r\v\f':
+        classes[code] = _CHAR_WHITESPACE
+    # Identifiers are ASCII only, non-ASCII letters outside of strings are reported as unknown symbols
+    for code in b'@_' + ascii_letters.encode('ascii'):
+        classes[code] = _CHAR_IDENTIFIER
+    for code in b'0123456789':
+        classes[code] = _CHAR_DIGIT
+    classes[ord('"')] = _CHAR_STRING
+    classes[ord('-')] = _CHAR_MINUS
+    classes[ord('/')] = _CHAR_SLASH
+    return bytes(classes)
+
+
+_CHAR_CLASSES = _build_char_classes()
 
 
 class FGDLexer:
+    __slots__ = ('buffer', 'buffer_name')
 
-    def __init__(self, buffer: str, buffer_name: str = '<memory>'):
+    def __init__(self, buffer: Union[bytes, mmap.mmap, str], buffer_name: str = '<memory>'):
+        if isinstance(buffer, str):
+            buffer = buffer.encode('utf-8')
         self.buffer = buffer
         self.buffer_name = buffer_name
-        self._offset = 0
-        self._line = 1
-        self._column = 1
-
-    @property
-    def symbol(self):
-        if self._offset < len(self.buffer):
-            return self.buffer[self._offset]
-        else:
-            return ""
-
-    @property
-    def next_symbol(self):
-        if self._offset + 1 < len(self.buffer):
-            return self.buffer[self._offset + 1]
-        else:
-            return ""
-
-    @property
-    def leftover(self):
-        return self.buffer[self._offset:]
-
-    @property
-    def line(self):
-        return self._line
-
-    @property
-    def column(self):
-        return self._column
 
-    def advance(self):
-        symbol = self.symbol
-        if symbol:
-            if symbol == '\r' and self.next_symbol == '\n':
-                self._offset += 1
-
-            if symbol == '\n' or symbol == '\r':
-                self._line += 1
-                self._column = 1
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.buffer = None
+
+    def location(self, offset):
+        if self.buffer is None:
+            raise FGDLexerException(f"Cannot locate offset {offset} in {self.buffer_name}, the lexer is closed")
+        line = self.buffer[:offset].count(b'\n') + 1
+        column = offset - self.buffer.rfind(b'\n', 0, offset)
+        return line, column
+
+    def tokenize(self):
+        """Lex the whole buffer, returning the tokens and the offset each of them ends at."""
+        buffer = self.buffer
+        length = len(buffer)
+        offset = 0
+        tokens = []
+        offsets = []
+        add_token = tokens.append
+        add_offset = offsets.append
+        while offset < length:
+            symbol = buffer[offset]
+            char_class = _CHAR_CLASSES[symbol]
+            if char_class == _CHAR_SINGLE:
+                token = _SINGLE_CHAR_TUPLES[symbol]
+                offset += 1
+            elif char_class == _CHAR_WHITESPACE:
+                offset = _WHITESPACE_RE.match(buffer, offset).end()
+                continue
+            elif char_class == _CHAR_IDENTIFIER:
+                end = _IDENTIFIER_RE.match(buffer, offset).end()
+                # Identifiers repeat heavily (property types, input/output, base, ...), share one str per name
+                value = intern(buffer[offset:end].decode('latin-1'))
+                token = (FGDToken.KEYWORD if symbol == _AT else FGDToken.IDENTIFIER), value
+                offset = end
+            elif char_class == _CHAR_STRING:
+                end = buffer.find(b'"', offset + 1)
+                if end == -1:
+                    raise FGDLexerException(f"Unexpected EOF in {self.buffer_name}")
+                value = buffer[offset + 1:end]
+                try:
+                    value = value.decode('utf-8')
+                except UnicodeDecodeError:
+                    # Older FGDs are saved in a Windows codepage, keep their characters instead of replacing them
+                    value = value.decode('latin-1')
+                token = FGDToken.STRING, value
+                offset = end + 1
+            elif char_class == _CHAR_DIGIT or (char_class == _CHAR_MINUS and offset + 1 < length and
+                                               _CHAR_CLASSES[buffer[offset + 1]] == _CHAR_DIGIT):
+                match = _NUMERIC_RE.match(buffer, offset)
+                if match.lastindex:  # has a fraction or an exponent
+                    token = FGDToken.NUMERIC, float(match.group())
+                else:
+                    token = FGDToken.NUMERIC, int(match.group())
+                offset = match.end()
+            elif char_class == _CHAR_SLASH and offset + 1 < length and buffer[offset + 1] == _SLASH:
+                end = buffer.find(b'\n', offset + 2)
+                offset = length if end == -1 else end
+                continue
+            elif char_class == _CHAR_SLASH and offset + 1 < length and buffer[offset + 1] == _ASTERISK:
+                end = buffer.find(b'*/', offset + 2)
+                if end == -1:
+                    raise FGDLexerException(f"Unexpected EOF in {self.buffer_name}")
+                offset = end + 2
+                continue
+            elif char_class == _CHAR_INVALID:
+                line, column = self.location(offset)
+                # A UTF-8 sequence is at most 4 bytes long, decode it whole so the message shows the actual character
+                bad_symbol = buffer[offset:offset + 4].decode('utf-8', 'replace')[0]
+                raise FGDLexerException(
+                    f'Unknown symbol "{bad_symbol}" in "{self.buffer_name}" at {line}:{column}')
             else:
-                self._column += 1
-            self._offset += 1
-        return symbol
+                token = _SINGLE_CHAR_TUPLES[symbol]
+                offset += 1
+            add_token(token)
+            add_offset(offset)
+        add_token((FGDToken.EOF, None))
+        add_offset(offset)
+        return tokens, offsets
 
-    def skip(self, count=1):
-        for _ in range(count):
-            self.advance()
 
-    def lex(self):
-        while self._offset < len(self.buffer):
-            if self.symbol == '"':
-                self.advance()
-                string_buffer = ""
-                while True:
-                    if self.symbol == '"':
-                        self.advance()
-                        break
-                    string_buffer += self.advance()
-                yield FGDToken.STRING, string_buffer
-            elif self.symbol.isspace():
-                self.advance()
-            elif self.symbol.isdigit() or (self.symbol == '-' and self.next_symbol.isdigit()):
-                num_buffer = ""
-                while self.symbol.isdigit() or (self.symbol == '-' and self.next_symbol.isdigit()):
-                    num_buffer += self.advance()
-                yield FGDToken.NUMERIC, int(num_buffer)
-            elif self.symbol.isidentifier() or self.symbol == '@':
-                string_buffer = self.advance()
-                while True:
-                    if self.symbol.isspace() or not (self.symbol.isidentifier() or self.symbol.isdigit()):
-                        break
-                    string_buffer += self.advance()
-                if string_buffer.startswith('@'):
-                    yield FGDToken.KEYWORD, string_buffer
-                else:
-                    yield FGDToken.IDENTIFIER, string_buffer
-            elif self.symbol == '/' and self.next_symbol == '/':
-                while True:
-                    if self.symbol in '\n\r':
-                        break
-                    self.advance()
-            elif self.symbol == '/' and self.next_symbol == '*':
-                self.skip(2)
-                while True:
-                    if not self.symbol:
-                        raise FGDLexerException(f"Unexpected EOF in {self.buffer_name}")
-                    if self.symbol == '*' and self.next_symbol == '/':
-                        self.skip(2)
-                        break
-                    self.advance()
-            elif self.symbol == '{':
-                yield FGDToken.LBRACE, self.advance()
-            elif self.symbol == '}':
-                yield FGDToken.RBRACE, self.advance()
-            elif self.symbol == '(':
-                yield FGDToken.LPAREN, self.advance()
-            elif self.symbol == ')':
-                yield FGDToken.RPAREN, self.advance()
-            elif self.symbol == '[':
-                yield FGDToken.LBRACKET, self.advance()
-            elif self.symbol == ']':
-                yield FGDToken.RBRACKET, self.advance()
-            elif self.symbol == '=':
-                yield FGDToken.EQUALS, self.advance()
-            elif self.symbol == ':':
-                yield FGDToken.COLON, self.advance()
-            elif self.symbol == '-':
-                yield FGDToken.MINUS, self.advance()
-            elif self.symbol == '+':
-                yield FGDToken.PLUS, self.advance()
-            elif self.symbol == ',':
-                yield FGDToken.COMMA, self.advance()
-            elif self.symbol == '.':
-                yield FGDToken.DOT, self.advance()
-            elif self.symbol == '/':
-                yield FGDToken.FSLASH, self.advance()
-            elif self.symbol == '\\':
-                yield FGDToken.BSLASH, self.advance()
-            else:
-                raise FGDLexerException(
-                    f'Unknown symbol "{self.symbol}" in "{self.buffer_name}" at {self._line}:{self._column}')
-        yield FGDToken.EOF, None
+def _include_cache_key(path: Union[Path, str]) -> str:
+    # Same normalization ContentManager applies to lookups, plus case folding for case-insensitive game paths
+    return str(path).replace('\\', '/').replace('//', '/').strip('/').lower()
+
 
-    def __bool__(self):
-        return self._offset < len(self.buffer)
+# Tokens that continue a property's ':' separated display name/default/description list
+_PROPERTY_DATA_TOKENS = frozenset((FGDToken.STRING, FGDToken.NUMERIC, FGDToken.COLON))
 
 
 class FGDParser:
-    def __init__(self, path: Union[Path, str] = None, buffer_and_name: Tuple[str, str] = None):
+    __slots__ = ('_path', '_lexer', '_tokens', '_token_offsets', '_pos', '_include_cache',
+                 'classes', 'excludes', 'pragmas', 'includes', 'entity_groups', 'vis_groups')
+
+    def __init__(self, path: Union[Path, str] = None, buffer_and_name: Tuple[Union[bytes, str], str] = None,
+                 include_cache: Dict[str, Optional['FGDParser']] = None):
         if path is not None:
             self._path = Path(path)
-            with self._path.open() as f:
-                self._lexer = FGDLexer(f.read(), str(self._path))
+            with self._path.open('rb') as f:
+                # mmap refuses empty files
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._path.stat().st_size else b''
+                self._lexer = FGDLexer(buffer, str(self._path))
         elif buffer_and_name is not None:
             self._lexer = FGDLexer(*buffer_and_name)
             self._path = buffer_and_name[1]
-        self._tokens = self._lexer.lex()
-        self._last_peek = None
+        try:
+            self._tokens, self._token_offsets = self._lexer.tokenize()
+        except Exception:
+            self._lexer.close()
+            raise
+        self._pos = 0
+        # Parsed includes, shared with nested parsers so each file is parsed once per root FGD.
+        # None marks an include that is still being parsed further up the include chain.
+        self._include_cache: Dict[str, Optional['FGDParser']] = {} if include_cache is None else include_cache
 
         self.classes: List[FGDEntity] = []
         self.excludes = []
@@ -187,71 +249,105 @@ class FGDParser:
         self.entity_groups = []
         self.vis_groups = {}
 
+    def _root_include_key(self) -> Optional[str]:
+        # Key the root file the way an @include of it would be, so an include cycle back to the root stops there.
+        # Only a content relative path identifies it, a bare file name may as well resolve to a different FGD.
+        if not isinstance(self._path, Path):
+            return _include_cache_key(self._path)
+        relative_path = ContentManager().get_relative_path(self._path.absolute())
+        if relative_path is None:
+            return None
+        return _include_cache_key(relative_path)
+
     def peek(self):
-        if self._last_peek is None:
-            self._last_peek = next(self._tokens)
-        return self._last_peek
+        return self._tokens[self._pos]
 
     def advance(self):
-        if self._last_peek is not None:
-            ret = self._last_peek
-            self._last_peek = None
-            return ret
-        return next(self._tokens)
+        token = self._tokens[self._pos]
+        self._pos += 1
+        return token
+
+    def _location(self):
+        line, column = self._lexer.location(self._token_offsets[self._pos])
+        return f"{line}:{column}"
 
     def expect(self, token_type):
-        token, value = self.peek()
-        if token == token_type:
-            self.advance()
+        token, value = self._tokens[self._pos]
+        if token is token_type:
+            self._pos += 1
             return value
         else:
-            raise FGDParserException(f"Unexpected token {token_type}, got {token}:\"{value}\" "
-                                     f"in {self._path} at {self._lexer.line}:{self._lexer.column}")
+            raise FGDParserException(f"Unexpected token {_TOKEN_NAMES[token_type]}, "
+                                     f"got {_TOKEN_NAMES[token]}:\"{value}\" "
+                                     f"in {self._path} at {self._location()}")
 
     def match(self, token_type, consume=False):
-        token, value = self.peek()
-        if token == token_type:
+        if self._tokens[self._pos][0] is token_type:
             if consume:
-                self.advance()
+                self._pos += 1
             return True
         return False
 
     def parse(self):
-        while self._lexer:
-            if self.match(FGDToken.KEYWORD):
-                _, value = self.advance()
-                if value == '@mapsize':
-                    self._parse_mapsize()
-                elif value.lower() == "@include":
-                    self._parse_include()
-                elif value.lower() == '@exclude':
-                    self.excludes.append(self.expect(FGDToken.IDENTIFIER))
-                elif value.lower() == '@entitygroup':
-                    self._parse_entity_group()
-                elif value.lower() == '@materialexclusion':
-                    self._parse_material_exclusion()
-                elif value.lower() == '@autovisgroup':
-                    self._parse_autovis_group()
-                elif value.startswith('@') and value.lower().endswith("class"):
-                    self._parse_baseclass(value[1:])
-            elif self.match(FGDToken.EOF):
-                break
-            else:
-                token, value = self.peek()
-                raise FGDParserException(
-                    f"Unexpected token {token}:\"{value}\" in {self._path} at {self._lexer.line}:{self._lexer.column}")
+        match = self.match
+        advance = self.advance
+        peek = self.peek
+        KEYWORD = FGDToken.KEYWORD
+        EOF = FGDToken.EOF
+
+        try:
+            while True:
+                if match(KEYWORD):
+                    _, value = advance()
+                    keyword = value.lower()
+                    handler = self._KEYWORD_HANDLERS.get(keyword)
+                    if handler is not None:
+                        handler(self)
+                    elif keyword.endswith("class"):
+                        self._parse_baseclass(value[1:])
+                elif match(EOF):
+                    break
+                else:
+                    token, value = peek()
+                    raise FGDParserException(
+                        f"Unexpected token {_TOKEN_NAMES[token]}:\"{value}\" in {self._path} at {self._location()}")
+        finally:
+            # Unmap the file even when parsing fails, error messages are built before raising
+            self._lexer.close()
 
     def _parse_include(self):
         include = self.expect(FGDToken.STRING)
-        file = ContentManager().find_file(include)
-        if file is not None:
-            parsed_include = FGDParser(buffer_and_name=(file.read().decode("ascii"), include))
+        cache_key = _include_cache_key(include)
+        if not self._include_cache:  # First include of the root FGD
+            root_key = self._root_include_key()
+            if root_key is not None:
+                self._include_cache[root_key] = None
+        if cache_key in self._include_cache:
+            parsed_include = self._include_cache[cache_key]
+            if parsed_include is None:
+                return
+        else:
+            file = ContentManager().find_file(include)
+            if file is None:
+                return
+            self._include_cache[cache_key] = None
+            parsed_include = FGDParser(buffer_and_name=(file.read(), include), include_cache=self._include_cache)
             parsed_include.parse()
-            self.classes.extend(parsed_include.classes)
-            self.pragmas.update(parsed_include.pragmas)
-            self.excludes.extend(parsed_include.excludes)
-            self.entity_groups.extend(parsed_include.entity_groups)
-            self.includes.append(include)
+            self._include_cache[cache_key] = parsed_include
+        # Every includer gets its own entities, an OverrideClass edits them in place and must not leak into the
+        # other files that include the same FGD. Duplicates within one include stay a single object.
+        copies = {}
+        for cls in parsed_include.classes:
+            if id(cls) not in copies:
+                copies[id(cls)] = cls.copy()
+            self.classes.append(copies[id(cls)])
+        self.pragmas.update(parsed_include.pragmas)
+        self.excludes.extend(parsed_include.excludes)
+        self.entity_groups.extend(parsed_include.entity_groups)
+        self.includes.append(include)
+
+    def _parse_exclude(self):
+        self.excludes.append(self.expect(FGDToken.IDENTIFIER))
 
     def _parse_mapsize(self):
         self.expect(FGDToken.LPAREN)
@@ -280,63 +376,69 @@ class FGDParser:
         return None
 
     def _parse_baseclass(self, class_type):
+        match = self.match
+        expect = self.expect
+        advance = self.advance
+        peek = self.peek
+        IDENTIFIER = FGDToken.IDENTIFIER
+        EQUALS = FGDToken.EQUALS
+        LPAREN = FGDToken.LPAREN
+        RPAREN = FGDToken.RPAREN
 
         definitions = []
-        if self.match(FGDToken.IDENTIFIER):
-            while not self.match(FGDToken.EQUALS):
-                meta_prop_type = self.expect(FGDToken.IDENTIFIER)
+        if match(IDENTIFIER):
+            while not match(EQUALS):
+                meta_prop_type = expect(IDENTIFIER)
                 if meta_prop_type == 'base':
                     definitions.append((meta_prop_type, self._parse_bases()))
 
                 elif meta_prop_type == 'color':
-                    self.expect(FGDToken.LPAREN)
-                    r = self.expect(FGDToken.NUMERIC)
-                    g = self.expect(FGDToken.NUMERIC)
-                    b = self.expect(FGDToken.NUMERIC)
-                    self.expect(FGDToken.RPAREN)
+                    expect(LPAREN)
+                    r = expect(FGDToken.NUMERIC)
+                    g = expect(FGDToken.NUMERIC)
+                    b = expect(FGDToken.NUMERIC)
+                    expect(RPAREN)
                     definitions.append((meta_prop_type, (r, g, b)))
                 elif meta_prop_type == 'metadata':
                     meta = {}
-                    self.expect(FGDToken.LBRACE)
-                    while not self.match(FGDToken.RBRACE):
-                        key = self.expect(FGDToken.IDENTIFIER)
-                        self.expect(FGDToken.EQUALS)
-                        value = self.expect(FGDToken.STRING)
+                    expect(FGDToken.LBRACE)
+                    while not match(FGDToken.RBRACE):
+                        key = expect(IDENTIFIER)
+                        expect(EQUALS)
+                        value = expect(FGDToken.STRING)
                         meta[key] = value
-                    self.expect(FGDToken.RBRACE)
+                    expect(FGDToken.RBRACE)
                     definitions.append((meta_prop_type, meta))
                 else:
-                    if self.match(FGDToken.LPAREN):
-                        self.expect(FGDToken.LPAREN)
+                    if match(LPAREN, True):
                         meta = []
-                        while not self.match(FGDToken.RPAREN):
-                            meta.append(self.advance()[1])
-                            if self.match(FGDToken.COMMA):
-                                self.advance()
-                        self.expect(FGDToken.RPAREN)
+                        while not match(RPAREN):
+                            meta.append(advance()[1])
+                            if match(FGDToken.COMMA):
+                                advance()
+                        expect(RPAREN)
                         definitions.append((meta_prop_type, meta))
                     else:
                         definitions.append((meta_prop_type, True))
 
-        self.expect(FGDToken.EQUALS)
-        class_name = self.expect(FGDToken.IDENTIFIER)
+        expect(EQUALS)
+        class_name = expect(IDENTIFIER)
 
         doc = None
-        if self.match(FGDToken.COLON, True):
-            if self.match(FGDToken.STRING):
+        if match(FGDToken.COLON, True):
+            if match(FGDToken.STRING):
                 doc = self._parse_joined_string()
 
-        self.expect(FGDToken.LBRACKET)
+        expect(FGDToken.LBRACKET)
         io = []
         props = []
-        while self.match(FGDToken.IDENTIFIER):
-            token, ident = self.peek()
-            if token == FGDToken.IDENTIFIER and ident in ['input', 'output']:
+        while match(IDENTIFIER):
+            if peek()[1] in ('input', 'output'):
                 self._parse_class_io(io)
             else:
                 self._parse_class_param(props)
 
-        self.expect(FGDToken.RBRACKET)
+        expect(FGDToken.RBRACKET)
         if class_type == 'OverrideClass':
             class_obj = self._find_parent_class(class_name)
             if class_obj is None:
@@ -348,25 +450,25 @@ class FGDParser:
         self.classes.append(class_obj)
 
     def _parse_fully_qualified_identifier(self):
-        p1 = self.expect(FGDToken.IDENTIFIER)
+        parts = [self.expect(FGDToken.IDENTIFIER)]
         while self.match(FGDToken.DOT, True):
-            p1 += '.' + self.expect(FGDToken.IDENTIFIER)
-        return p1
+            parts.append(self.expect(FGDToken.IDENTIFIER))
+        return '.'.join(parts)
 
     def _parse_complex_type(self):
-        p1 = self.expect(FGDToken.IDENTIFIER)
+        parts = [self.expect(FGDToken.IDENTIFIER)]
         while self.match(FGDToken.COLON, True):
-            p1 += ':' + self.expect(FGDToken.IDENTIFIER)
-        return p1
+            parts.append(self.expect(FGDToken.IDENTIFIER))
+        return ':'.join(parts)
 
     def _parse_joined_string(self):
-        p1 = self.expect(FGDToken.STRING)
+        parts = [self.expect(FGDToken.STRING)]
         while self.match(FGDToken.PLUS, True):
             if self.match(FGDToken.STRING):
-                p1 += self.expect(FGDToken.STRING)
+                parts.append(self.expect(FGDToken.STRING))
             else:
                 break
-        return p1
+        return ''.join(parts)
 
     def _parse_bases(self):
         bases = []
@@ -379,13 +481,16 @@ class FGDParser:
         return bases
 
     def _parse_class_io(self, storage: list):
-        io_type = self.expect(FGDToken.IDENTIFIER)
-        name = self.expect(FGDToken.IDENTIFIER)
+        IDENTIFIER = FGDToken.IDENTIFIER
+        RPAREN = FGDToken.RPAREN
+
+        io_type = self.expect(IDENTIFIER)
+        name = self.expect(IDENTIFIER)
         self.expect(FGDToken.LPAREN)
         args = []
-        while not self.match(FGDToken.RPAREN):
-            args.append(self.expect(FGDToken.IDENTIFIER))
-        self.expect(FGDToken.RPAREN)
+        while not self.match(RPAREN):
+            args.append(self.expect(IDENTIFIER))
+        self.expect(RPAREN)
         if self.match(FGDToken.COLON):
             self.advance()
             doc_str = self._parse_joined_string() if self.match(FGDToken.STRING) else None
@@ -408,28 +513,36 @@ class FGDParser:
         return meta
 
     def _parse_class_param(self, storage):
+        match = self.match
+        expect = self.expect
+        advance = self.advance
+        peek = self.peek
+        COLON = FGDToken.COLON
+        STRING = FGDToken.STRING
+        NUMERIC = FGDToken.NUMERIC
+        RBRACKET = FGDToken.RBRACKET
+
         prop = {'meta': {}}
         name = self._parse_fully_qualified_identifier()
-        self.expect(FGDToken.LPAREN)
+        expect(FGDToken.LPAREN)
         param_type = self._parse_complex_type()
-        self.expect(FGDToken.RPAREN)
-        if self.match(FGDToken.IDENTIFIER) and self.peek()[1] in ['report', 'readonly']:
-            prop['meta'][self.expect(FGDToken.IDENTIFIER)] = True
-        if self.match(FGDToken.LBRACKET, True):
+        expect(FGDToken.RPAREN)
+        if match(FGDToken.IDENTIFIER) and peek()[1] in ['report', 'readonly']:
+            prop['meta'][expect(FGDToken.IDENTIFIER)] = True
+        if match(FGDToken.LBRACKET, True):
             prop['meta'].update(self._parse_class_param_meta())
 
         data = []
-        if self.match(FGDToken.COLON):
-            while True:
-                if not (self.match(FGDToken.STRING) or self.match(FGDToken.NUMERIC) or self.match(FGDToken.COLON)):
-                    break
-                self.expect(FGDToken.COLON)
+        if match(COLON):
+            while peek()[0] in _PROPERTY_DATA_TOKENS:
+                expect(COLON)
                 value = None  # No value, just 2 ":" symbols
-                if not self.match(FGDToken.COLON):  # We have value
-                    if self.match(FGDToken.STRING):  # String can be split by + signs, so we need to account for it
-                        value = self._parse_joined_string()
-                    elif self.match(FGDToken.NUMERIC):  # any other token
-                        value = self.expect(FGDToken.NUMERIC)
+                token, token_value = peek()
+                if token is STRING:  # String can be split by + signs, so we need to account for it
+                    value = self._parse_joined_string()
+                elif token is NUMERIC:
+                    value = token_value
+                    advance()
                 data.append(value)
             if len(data) == 3:
                 prop['display_name'], prop['default'], prop['doc'] = data
@@ -440,48 +553,48 @@ class FGDParser:
             else:
                 print(data)
 
-        if self.match(FGDToken.EQUALS) and "choices" in param_type.lower():
+        lower_param_type = param_type.lower() if match(FGDToken.EQUALS) else ''
+        if "choices" in lower_param_type:
             # parse choices
-            self.advance()
-            self.expect(FGDToken.LBRACKET)
+            advance()
+            expect(FGDToken.LBRACKET)
             choices = {}
-            while not self.match(FGDToken.RBRACKET):
-                choice_name = self.expect(FGDToken.STRING) if self.match(FGDToken.STRING) else self.expect(
-                    FGDToken.NUMERIC)
-                self.expect(FGDToken.COLON)
-                value = self.expect(FGDToken.STRING)
+            while not match(RBRACKET):
+                choice_name = expect(STRING) if match(STRING) else expect(NUMERIC)
+                expect(COLON)
+                value = expect(STRING)
                 choices[choice_name] = value
-            self.expect(FGDToken.RBRACKET)
+            expect(RBRACKET)
             prop['choices'] = choices
-        elif self.match(FGDToken.EQUALS) and 'flags' in param_type.lower():
+        elif 'flags' in lower_param_type:
             # parse flags
-            self.advance()
-            self.expect(FGDToken.LBRACKET)
+            advance()
+            expect(FGDToken.LBRACKET)
             flags = {}
-            while not self.match(FGDToken.RBRACKET):
-                mask = self.expect(FGDToken.NUMERIC)
-                self.expect(FGDToken.COLON)
-                flag_name = self.expect(FGDToken.STRING)
-                self.expect(FGDToken.COLON)
-                default = self.expect(FGDToken.NUMERIC)
+            while not match(RBRACKET):
+                mask = expect(NUMERIC)
+                expect(COLON)
+                flag_name = expect(STRING)
+                expect(COLON)
+                default = expect(NUMERIC)
 
                 flags[flag_name] = (mask, default)
-            self.expect(FGDToken.RBRACKET)
+            expect(RBRACKET)
             prop['flags'] = flags
-        elif self.match(FGDToken.EQUALS) and 'tag_list' in param_type.lower():
+        elif 'tag_list' in lower_param_type:
             # parse flags
-            self.advance()
-            self.expect(FGDToken.LBRACKET)
+            advance()
+            expect(FGDToken.LBRACKET)
             flags = {}
-            while not self.match(FGDToken.RBRACKET):
-                mask = self.expect(FGDToken.STRING)
-                self.expect(FGDToken.COLON)
-                tag_name = self.expect(FGDToken.STRING)
-                self.expect(FGDToken.COLON)
-                default = self.expect(FGDToken.NUMERIC)
+            while not match(RBRACKET):
+                mask = expect(STRING)
+                expect(COLON)
+                tag_name = expect(STRING)
+                expect(COLON)
+                default = expect(NUMERIC)
 
                 flags[tag_name] = (mask, default)
-            self.expect(FGDToken.RBRACKET)
+            expect(RBRACKET)
             prop['tag_list'] = flags
 
         prop['name'] = name
@@ -508,6 +621,15 @@ class FGDParser:
                 ent_name = self.expect(FGDToken.STRING)
                 vis_list.append(ent_name)
 
+    _KEYWORD_HANDLERS = {
+        '@mapsize': _parse_mapsize,
+        '@include': _parse_include,
+        '@exclude': _parse_exclude,
+        '@entitygroup': _parse_entity_group,
+        '@materialexclusion': _parse_material_exclusion,
+        '@autovisgroup': _parse_autovis_group,
+    }
+
 
 if __name__ == '__main__':
     test_file = Path(r"F:\SteamLibrary\steamapps\common\Half-Life Alyx\game\hlvr\hlvr.fgd")